@@ -1,24 +1,85 @@
 import math
+from functools import lru_cache
+
+try:
+    import gmpy2
+except ImportError:  # gmpy2 is optional, fall back to the builtin pow()
+    gmpy2 = None
 
 def int_to_bytes(n):
     """Converts int to bytes."""
     return n.to_bytes((n.bit_length() + 7) // 8, 'big')
 
 
+def powmod_sec(b, e, m):
+    """Computes b^e mod m for a secret exponent e, with GMP's mpz_powm_sec when gmpy2 is available.
+
+    Fixed-base exponentiations of secrets go through pow_table instead, which
+    performs the same products whatever the exponent, with or without gmpy2.
+    """
+    if gmpy2 is None:
+        return pow(b, e, m)
+    return int(gmpy2.powmod_sec(b, e, m))
+
+
+@lru_cache(maxsize=None)
+def precompute_pow_table(g, p, bits=256, w=4):
+    """Precomputes table[i][j] = g^(j * 2^(w*i)) * o_i mod p for fixed-base exponentiation.
+
+    The offsets o_i (g on every row but the last, g^-(rows-1) on the last)
+    multiply to 1, so no entry is 1 and every window costs a full product.
+    Tables are cached, so modules sharing the same group reuse a single table.
+    """
+    rows = (bits + w - 1) // w
+    last = mod_inv(pow(g, rows - 1, p), p)
+    table = []
+    b = g
+    for i in range(rows):
+        t = g if i < rows - 1 else last
+        row = []
+        for _ in range(1 << w):
+            row.append(t)
+            t = t * b % p
+        table.append(row)
+        b = pow(b, 1 << w, p)
+    return table
+
+
+def pow_table(e, table, p, w=4):
+    """Computes g^e mod p from a table built by precompute_pow_table, with one product per window."""
+    if e >> (len(table) * w):
+        raise ValueError("exponent too large for the precomputed table")
+    mask = (1 << w) - 1
+    r = 1
+    for row in table:
+        r = r * row[e & mask] % p
+        e >>= w
+    return r
+
+
 def mod_inv(a, n):
-    t, r = 1, a
-    new_t, new_r = 0, n
+    """Computes a^(-1) mod n with the builtin (or GMP) modular inverse."""
+    try:
+        if gmpy2 is not None:
+            return int(gmpy2.invert(a, n))
+        return pow(a, -1, n)
+    except (ValueError, ZeroDivisionError):
+        raise Exception("a is not invertible") from None
 
-    while new_r != 0:
-        quotient = r // new_r
-        t, new_t = new_t, t - quotient * new_t
-        r, new_r = new_r, r - quotient * new_r
 
-    if r > 1:
-        raise Exception("a is not invertible")
-    if t < 0:
-        t = t + n
-    return t
+def batch_mod_inv(xs, n):
+    """Inverts every element of xs modulo n with a single mod_inv (Montgomery's trick)."""
+    prefix = []
+    acc = 1
+    for x in xs:
+        prefix.append(acc)
+        acc = acc * x % n
+    inv = mod_inv(acc, n)
+    invs = [0] * len(xs)
+    for i in range(len(xs) - 1, -1, -1):
+        invs[i] = inv * prefix[i] % n
+        inv = inv * xs[i] % n
+    return invs
 
 
 def mod_sqrt(a, p):
@@ -60,4 +121,28 @@ def mod_sqrt(a, p):
         g = (gs * gs) % p
         x = (x * gs) % p
         b = (b * g) % p
-        r = m
\ No newline at end of file
+        r = m
+
+def multi_exp(g, a, y, b, p, w=2):
+    """Computes g^a * y^b mod p with Shamir's trick (joint w-bit windows)."""
+    if gmpy2 is not None:
+        # GMP's exponentiation beats the interpreted joint scan
+        return int(gmpy2.powmod(g, a, p) * gmpy2.powmod(y, b, p) % p)
+
+    n = 1 << w
+    g_pows, y_pows = [1] * n, [1] * n
+    for i in range(1, n):
+        g_pows[i] = g_pows[i - 1] * g % p
+        y_pows[i] = y_pows[i - 1] * y % p
+    table = [[gi * yj % p for yj in y_pows] for gi in g_pows]
+
+    mask = n - 1
+    bits = max(a.bit_length(), b.bit_length())
+    r = 1
+    for i in range(((bits + w - 1) // w - 1) * w, -1, -w):
+        for _ in range(w):
+            r = r * r % p
+        da, db = (a >> i) & mask, (b >> i) & mask
+        if da or db:
+            r = r * table[da][db] % p
+    return r
@@ -0,0 +1,29 @@
+from hashlib import sha256
+
+### HMAC-SHA256 with a fixed key, for the V = HMAC_K(V) chain of RFC 6979
+
+# K XOR ipad / K XOR opad byte translations (RFC 2104)
+IPAD = bytes(b ^ 0x36 for b in range(256))
+OPAD = bytes(b ^ 0x5C for b in range(256))
+
+
+def hmac_sha256_prf(key):
+    """Returns msg -> HMAC-SHA256(key, msg).
+
+    The SHA-256 states after absorbing key^ipad and key^opad are computed
+    once, then copied on each call instead of being rekeyed.
+    """
+    if len(key) > 64:
+        key = sha256(key).digest()
+    key = key.ljust(64, b'\x00')
+    inner0 = sha256(key.translate(IPAD))
+    outer0 = sha256(key.translate(OPAD))
+
+    def prf(msg):
+        inner = inner0.copy()
+        inner.update(msg)
+        outer = outer0.copy()
+        outer.update(inner.digest())
+        return outer.digest()
+
+    return prf
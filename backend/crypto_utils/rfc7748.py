@@ -1,3 +1,4 @@
+from functools import lru_cache
 from .algebra import mod_inv, mod_sqrt
 
 ### add (and double)
@@ -35,6 +36,64 @@ def mult(n, x1, y1, p):
             tx, ty = add(tx, ty, x1, y1, p)
     return tx, ty
 
+### fixed-base scalar multiplication with a precomputed window table
+### table[i][j] = j * 2^(w*i) * P + O_i, so n*P costs one addition per w-bit window.
+### The offsets O_i (P on every row but the last, -(rows-1)*P on the last) add
+### up to the identity: no entry is the (1, 0) sentinel, on which add() returns
+### early, so a zero window costs a real addition like any other
+### (tables are cached: modules sharing a base point reuse a single table)
+
+@lru_cache(maxsize=None)
+def precompute_table(x1, y1, p, bits=256, w=4):
+    rows = (bits + w - 1) // w
+    nx, ny = mult(rows - 1, x1, y1, p)
+    table = []
+    bx, by = x1, y1
+    for i in range(rows):
+        tx, ty = (x1, y1) if i < rows - 1 else (nx, -ny % p)
+        row = []
+        for _ in range(1 << w):
+            row.append((tx, ty))
+            tx, ty = add(tx, ty, bx, by, p)
+        table.append(row)
+        for _ in range(w):
+            bx, by = add(bx, by, bx, by, p)
+    return table
+
+def mult_table(n, table, p, w=4):
+    if n >> (len(table) * w):
+        raise ValueError("scalar too large for the precomputed table")
+    mask = (1 << w) - 1
+    tx, ty = 1, 0
+    for row in table:
+        x, y = row[n & mask]
+        tx, ty = add(tx, ty, x, y, p)
+        n >>= w
+    return tx, ty
+
+### n1*P1 + n2*P2 with Shamir's trick: one shared chain of doublings,
+### reading both scalars by joint w-bit windows
+
+def double_mult(n1, x1, y1, n2, x2, y2, p, w=2):
+    n = 1 << w
+    p1s, p2s = [(1, 0)] * n, [(1, 0)] * n
+    for i in range(1, n):
+        p1s[i] = add(p1s[i-1][0], p1s[i-1][1], x1, y1, p)
+        p2s[i] = add(p2s[i-1][0], p2s[i-1][1], x2, y2, p)
+    table = [[add(a[0], a[1], b[0], b[1], p) for b in p2s] for a in p1s]
+
+    mask = n - 1
+    bits = max(n1.bit_length(), n2.bit_length())
+    tx, ty = 1, 0
+    for i in range(((bits + w - 1) // w - 1) * w, -1, -w):
+        for _ in range(w):
+            tx, ty = add(tx, ty, tx, ty, p)
+        d1, d2 = (n1 >> i) & mask, (n2 >> i) & mask
+        if d1 or d2:
+            x, y = table[d1][d2]
+            tx, ty = add(tx, ty, x, y, p)
+    return tx, ty
+
 
 ### encoding and decoding functions from RFC 7448
 
@@ -102,6 +161,29 @@ def mul(k: int, u: int, bits: int, p: int, a24: int):
     res = x_2 * pow(z_2, p-2, p) % p
     return res
 
+### Montgomery ladder on full (u, v) points: fixed number of steps and
+### arithmetic swaps, with no branch on the bits of the scalar.
+### The top bit of n must be set: the registers start at (P, 2P) rather than
+### at the (1, 0) sentinel, on which add() returns early. The sentinel still
+### shows up if a prefix of n is a multiple of the order of P (for instance
+### n = 2*ORDER + 1). Not constant time either: add() branches on its
+### operands and calls a variable-time mod_inv
+
+def ladder(n, x1, y1, p, bits=256):
+    if n >> bits or not n >> (bits - 1):
+        raise ValueError("scalar must be exactly 'bits' bits long")
+    x_0, y_0 = x1, y1
+    x_r, y_r = add(x1, y1, x1, y1, p)
+    for t in range(bits-2, -1, -1):
+        k_t = (n >> t) & 1
+        x_0, x_r = cswap(k_t, x_0, x_r)
+        y_0, y_r = cswap(k_t, y_0, y_r)
+        x_r, y_r = add(x_0, y_0, x_r, y_r, p)
+        x_0, y_0 = add(x_0, y_0, x_0, y_0, p)
+        x_0, x_r = cswap(k_t, x_0, x_r)
+        y_0, y_r = cswap(k_t, y_0, y_r)
+    return x_0, y_0
+
 ### computes decoding, scalar multiplication and encoding for the u-coordinate
 
 def x25519(k: bytes, u: bytes):
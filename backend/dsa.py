@@ -1,7 +1,9 @@
-from crypto_utils.algebra import mod_inv
-from Crypto.Hash import SHA256, HMAC
+from crypto_utils.algebra import mod_inv, batch_mod_inv, multi_exp, powmod_sec, precompute_pow_table, pow_table
+from Crypto.Hash import SHA256
+from hmac import digest as hmac_digest
+from crypto_utils.rfc6979 import hmac_sha256_prf
 from secrets import randbelow
-from typing import Tuple
+from typing import Iterator, List, Tuple, Optional
 from crypto_utils.algebra import int_to_bytes
 
 ## parameters from MODP Group 24 -- Extracted from RFC 5114
@@ -11,7 +13,7 @@ PARAM_Q = 0x8CF83642A709A097B447997640129DA299B1A47D1EB3750BA308B0FE64F5FBD3
 
 PARAM_G = 0x3FB32C9B73134D0B2E77506660EDBD484CA7B18F21EF205407F4793A1A0BA12510DBC15077BE463FFF4FED4AAC0BB555BE3A6C1B0C6B47B1BC3773BF7E8C6F62901228F8C28CBB18A55AE31341000A650196F931C77A57F2DDF463E5E9EC144B777DE62AAAB8A8628AC376D282D6ED3864E67982428EBC831D14348F6F2F9193B5045AF2767164E1DFC967C1FB3F2E55A4BD1BFFE83B9C80D052B985D182EA0ADB2A3B7313D3FE14C8484B1E052588B9B7D2BBD2DF016199ECD06E1557CD0915B3353BBB64E0EC377FD028370DF92B52C7891428CDC67EB6184B523D1DB246C32F63078490F00EF8D647D148D47954515E2327CFEF98C582664B4C0F6CC41659
 
-def validate_params() -> bool:
+def _check_params() -> bool:
     """
     Vérifie que les paramètres DSA sont valides
     """
@@ -27,6 +29,19 @@ def validate_params() -> bool:
         
     return True
 
+# g^q mod p n'est calculé qu'une fois : DSA_generate_keys et DSA_verify
+# se contentent ensuite de lire le résultat
+_PARAMS_OK = _check_params()
+
+def validate_params() -> bool:
+    """
+    Indique si les paramètres DSA sont valides (vérifiés au chargement du module)
+    """
+    return _PARAMS_OK
+
+# Table des puissances du générateur, calculée une seule fois au chargement
+G_TABLE = precompute_pow_table(PARAM_G, PARAM_P, PARAM_Q.bit_length())
+
 def H(message: bytes) -> int:
     """
     Fonction de hachage SHA-256 pour DSA
@@ -37,8 +52,7 @@ def H(message: bytes) -> int:
     Returns:
         int: Le hash du message
     """
-    h = SHA256.new(message)
-    return int(h.hexdigest(), 16)
+    return int.from_bytes(SHA256.new(message).digest(), 'big')
 
 def bits2int(bits: bytes, qlen: int) -> int:
     """
@@ -73,20 +87,23 @@ def bits2octets(bits: bytes, q: int, qlen: int) -> bytes:
     z2 = z1 % q
     return int_to_bytes(z2)
 
-def DSA_generate_nonce(private_key: int, message: bytes, q: int = PARAM_Q) -> int:
+def _DSA_nonces(private_key: int, message: bytes, q: int = PARAM_Q,
+                h1: Optional[int] = None) -> Iterator[int]:
     """
-    Génère un nonce k pour DSA de manière déterministe selon RFC 6979
+    Génère les nonces candidats successifs pour DSA de manière déterministe selon RFC 6979
     
     Args:
         private_key: La clé privée
         message: Le message à signer
         q: L'ordre du sous-groupe
+        h1: H(message) s'il a déjà été calculé par l'appelant
         
     Returns:
-        int: Le nonce k
+        Iterator[int]: Les nonces k, dans l'ordre de la RFC 6979
     """
-    # 1. Calcule h1 = H(message)
-    h1 = H(message)
+    # 1. Calcule h1 = H(message), sauf s'il est fourni
+    if h1 is None:
+        h1 = H(message)
     
     # Calcule la taille en bits de q
     qlen = q.bit_length()
@@ -102,34 +119,53 @@ def DSA_generate_nonce(private_key: int, message: bytes, q: int = PARAM_Q) -> in
     k = b'\x00' * 32
     
     # 5. Calcule K = HMAC_K(V || 0x00 || x || h1)
-    k = HMAC.new(k, v + b'\x00' + x + h1_bytes, SHA256).digest()
+    k = hmac_digest(k, v + b'\x00' + x + h1_bytes, 'sha256')
     
     # 6. Calcule V = HMAC_K(V)
-    v = HMAC.new(k, v, SHA256).digest()
+    v = hmac_digest(k, v, 'sha256')
     
     # 7. Calcule K = HMAC_K(V || 0x01 || x || h1)
-    k = HMAC.new(k, v + b'\x01' + x + h1_bytes, SHA256).digest()
+    k = hmac_digest(k, v + b'\x01' + x + h1_bytes, 'sha256')
     
-    # 8. Calcule V = HMAC_K(V)
-    v = HMAC.new(k, v, SHA256).digest()
+    # 8. Calcule V = HMAC_K(V) ; K ne change plus tant que le nonce est valide
+    prf = hmac_sha256_prf(k)
+    v = prf(v)
     
     # 9. Génère T
     while True:
         t = b''
         while len(t) * 8 < qlen:
-            v = HMAC.new(k, v, SHA256).digest()
+            v = prf(v)
             t += v
             
         # Convertit T en un nonce
         nonce = bits2int(t, qlen)
         
-        # Vérifie que le nonce est valide
+        # Propose le nonce s'il est dans l'intervalle
         if 0 < nonce < q:
-            return nonce
+            yield nonce
             
-        # Si non valide, continue avec K = HMAC_K(V || 0x00)
-        k = HMAC.new(k, v + b'\x00', SHA256).digest()
-        v = HMAC.new(k, v, SHA256).digest()
+        # Candidat hors intervalle ou refusé par l'appelant (r ou s nul) :
+        # continue avec K = HMAC_K(V || 0x00) (RFC 6979, section 3.2, étape h.3)
+        k = hmac_digest(k, v + b'\x00', 'sha256')
+        prf = hmac_sha256_prf(k)
+        v = prf(v)
+
+def DSA_generate_nonce(private_key: int, message: bytes, q: int = PARAM_Q,
+                       h1: Optional[int] = None) -> int:
+    """
+    Génère un nonce k pour DSA de manière déterministe selon RFC 6979
+    
+    Args:
+        private_key: La clé privée
+        message: Le message à signer
+        q: L'ordre du sous-groupe
+        h1: H(message) s'il a déjà été calculé par l'appelant
+        
+    Returns:
+        int: Le nonce k
+    """
+    return next(_DSA_nonces(private_key, message, q, h1))
 
 def DSA_generate_keys(p: int = PARAM_P, q: int = PARAM_Q, g: int = PARAM_G) -> Tuple[int, int]:
     """
@@ -153,10 +189,32 @@ def DSA_generate_keys(p: int = PARAM_P, q: int = PARAM_Q, g: int = PARAM_G) -> T
     private_key = randbelow(q-2) + 1
     
     # Calcule la clé publique y = g^x mod p
-    public_key = pow(g, private_key, p)
+    public_key = powmod_sec(g, private_key, p)
     
     return private_key, public_key
 
+def _DSA_sign_with_nonce(h: int, private_key: int, k: int, k_inv: int) -> Optional[Tuple[int, int]]:
+    """
+    Termine une signature DSA avec le nonce k et son inverse k_inv
+    
+    Args:
+        h: Le hash du message
+        private_key: La clé privée
+        k, k_inv: Le nonce et son inverse modulo PARAM_Q
+        
+    Returns:
+        Optional[Tuple[int, int]]: La signature (r, s), ou None si r ou s est nul
+    """
+    # Calcule r = (g^k mod p) mod q, un produit par fenêtre de k quelle que soit sa valeur
+    r = pow_table(k, G_TABLE, PARAM_P) % PARAM_Q
+    
+    # Calcule s = k^(-1)(h + x*r) mod q
+    s = (k_inv * (h + private_key * r)) % PARAM_Q
+    
+    if r == 0 or s == 0:
+        return None
+    return r, s
+
 def DSA_sign(message: bytes, private_key: int) -> Tuple[int, int]:
     """
     Signe un message avec DSA
@@ -167,22 +225,48 @@ def DSA_sign(message: bytes, private_key: int) -> Tuple[int, int]:
     # Calcule le hash du message
     h = H(message)
     
-    while True:
-        # Génère un nonce k de manière déterministe
-        k = DSA_generate_nonce(private_key, message)
+    # Essaie les nonces successifs de la RFC 6979 jusqu'à obtenir r et s non nuls
+    for k in _DSA_nonces(private_key, message, h1=h):
+        signature = _DSA_sign_with_nonce(h, private_key, k, mod_inv(k, PARAM_Q))
+        if signature is not None:
+            return signature
+
+def DSA_sign_batch(messages: List[bytes], private_keys: List[int]) -> List[Tuple[int, int]]:
+    """
+    Signe plusieurs messages avec DSA en n'inversant qu'une fois les nonces
+    
+    Args:
+        messages: Les messages à signer
+        private_keys: La clé privée associée à chaque message
         
-        # Calcule r = (g^k mod p) mod q
-        r = pow(PARAM_G, k, PARAM_P) % PARAM_Q
-        if r == 0:
-            continue
+    Returns:
+        List[Tuple[int, int]]: Les signatures (r, s), dans l'ordre des messages
         
-        # Calcule s = k^(-1)(h + x*r) mod q
-        k_inv = mod_inv(k, PARAM_Q)
-        s = (k_inv * (h + private_key * r)) % PARAM_Q
-        if s == 0:
-            continue
-            
-        return r, s
+    Raises:
+        ValueError: Si les listes n'ont pas la même longueur ou si une clé est invalide
+    """
+    if len(messages) != len(private_keys):
+        raise ValueError("Il faut une clé privée par message")
+    
+    for private_key in private_keys:
+        if not 0 < private_key < PARAM_Q:
+            raise ValueError("Clé privée invalide")
+    
+    # Calcule h et k pour chaque message
+    hs = [H(message) for message in messages]
+    ks = [DSA_generate_nonce(x, message, h1=h) for message, x, h in zip(messages, private_keys, hs)]
+    
+    # Une seule inversion modulaire pour tous les k (astuce de Montgomery)
+    k_invs = batch_mod_inv(ks, PARAM_Q)
+    
+    signatures = []
+    for message, x, h, k, k_inv in zip(messages, private_keys, hs, ks, k_invs):
+        signature = _DSA_sign_with_nonce(h, x, k, k_inv)
+        # Cas dégénéré (r ou s nul) : DSA_sign passe au nonce suivant de la RFC 6979
+        if signature is None:
+            signature = DSA_sign(message, x)
+        signatures.append(signature)
+    return signatures
 
 def DSA_verify(message: bytes, signature: Tuple[int, int], public_key: int, 
                p: int = PARAM_P, q: int = PARAM_Q, g: int = PARAM_G) -> bool:
@@ -220,8 +304,8 @@ def DSA_verify(message: bytes, signature: Tuple[int, int], public_key: int,
     # Calcule u2 = rw mod q
     u2 = (r * w) % q
     
-    # Calcule v = ((g^u1 * y^u2) mod p) mod q
-    v = ((pow(g, u1, p) * pow(public_key, u2, p)) % p) % q
+    # Calcule v = ((g^u1 * y^u2) mod p) mod q en une seule passe (astuce de Shamir)
+    v = multi_exp(g, u1, public_key, u2, p) % q
     
     # Vérifie si v = r
     return v == r
@@ -1,8 +1,10 @@
-from crypto_utils.rfc7748 import x25519, add, computeVcoordinate, mult
-from Crypto.Hash import SHA256, HMAC
+from crypto_utils.rfc7748 import x25519, computeVcoordinate, precompute_table, mult_table, double_mult
+from Crypto.Hash import SHA256
+from hmac import digest as hmac_digest
+from crypto_utils.rfc6979 import hmac_sha256_prf
 from secrets import randbelow
-from crypto_utils.algebra import mod_inv, int_to_bytes
-from typing import Tuple
+from crypto_utils.algebra import mod_inv, batch_mod_inv, int_to_bytes
+from typing import Iterator, List, Tuple, Optional
 
 # Paramètres de la courbe
 p = 2**255 - 19
@@ -12,6 +14,9 @@ ORDER = (2**252 + 27742317777372353535851937790883648493)
 BaseU = 9
 BaseV = computeVcoordinate(BaseU)
 
+# Table des multiples du point de base, calculée une seule fois au chargement
+BASE_TABLE = precompute_table(BaseU, BaseV, p)
+
 def validate_point(x: int, y: int, p: int) -> bool:
     """
     Vérifie si un point est sur la courbe Montgomery
@@ -32,8 +37,7 @@ def H(message: bytes) -> int:
     Returns:
         int: Le hash du message
     """
-    h = SHA256.new(message)
-    return int(h.hexdigest(), 16)
+    return int.from_bytes(SHA256.new(message).digest(), 'big')
 
 def bits2int(bits: bytes, qlen: int) -> int:
     """
@@ -68,20 +72,23 @@ def bits2octets(bits: bytes, q: int, qlen: int) -> bytes:
     z2 = z1 % q
     return int_to_bytes(z2)
 
-def ECDSA_generate_nonce(private_key: int, message: bytes, order: int = ORDER) -> int:
+def _ECDSA_nonces(private_key: int, message: bytes, order: int = ORDER,
+                  h1: Optional[int] = None) -> Iterator[int]:
     """
-    Génère un nonce k pour ECDSA de manière déterministe selon RFC 6979
+    Génère les nonces candidats successifs pour ECDSA de manière déterministe selon RFC 6979
     
     Args:
         private_key: La clé privée
         message: Le message à signer
         order: L'ordre du groupe
+        h1: H(message) s'il a déjà été calculé par l'appelant
         
     Returns:
-        int: Le nonce k
+        Iterator[int]: Les nonces k, dans l'ordre de la RFC 6979
     """
-    # 1. Calcule h1 = H(message)
-    h1 = H(message)
+    # 1. Calcule h1 = H(message), sauf s'il est fourni
+    if h1 is None:
+        h1 = H(message)
     
     # Calcule la taille en bits de l'ordre
     qlen = order.bit_length()
@@ -97,34 +104,53 @@ def ECDSA_generate_nonce(private_key: int, message: bytes, order: int = ORDER) -
     k = b'\x00' * 32
     
     # 5. Calcule K = HMAC_K(V || 0x00 || x || h1)
-    k = HMAC.new(k, v + b'\x00' + x + h1_bytes, SHA256).digest()
+    k = hmac_digest(k, v + b'\x00' + x + h1_bytes, 'sha256')
     
     # 6. Calcule V = HMAC_K(V)
-    v = HMAC.new(k, v, SHA256).digest()
+    v = hmac_digest(k, v, 'sha256')
     
     # 7. Calcule K = HMAC_K(V || 0x01 || x || h1)
-    k = HMAC.new(k, v + b'\x01' + x + h1_bytes, SHA256).digest()
+    k = hmac_digest(k, v + b'\x01' + x + h1_bytes, 'sha256')
     
-    # 8. Calcule V = HMAC_K(V)
-    v = HMAC.new(k, v, SHA256).digest()
+    # 8. Calcule V = HMAC_K(V) ; K ne change plus tant que le nonce est valide
+    prf = hmac_sha256_prf(k)
+    v = prf(v)
     
     # 9. Génère T
     while True:
         t = b''
         while len(t) * 8 < qlen:
-            v = HMAC.new(k, v, SHA256).digest()
+            v = prf(v)
             t += v
             
         # Convertit T en un nonce
         nonce = bits2int(t, qlen)
         
-        # Vérifie que le nonce est valide
+        # Propose le nonce s'il est dans l'intervalle
         if 0 < nonce < order:
-            return nonce
+            yield nonce
             
-        # Si non valide, continue avec K = HMAC_K(V || 0x00)
-        k = HMAC.new(k, v + b'\x00', SHA256).digest()
-        v = HMAC.new(k, v, SHA256).digest()
+        # Candidat hors intervalle ou refusé par l'appelant (r ou s nul) :
+        # continue avec K = HMAC_K(V || 0x00) (RFC 6979, section 3.2, étape h.3)
+        k = hmac_digest(k, v + b'\x00', 'sha256')
+        prf = hmac_sha256_prf(k)
+        v = prf(v)
+
+def ECDSA_generate_nonce(private_key: int, message: bytes, order: int = ORDER,
+                         h1: Optional[int] = None) -> int:
+    """
+    Génère un nonce k pour ECDSA de manière déterministe selon RFC 6979
+    
+    Args:
+        private_key: La clé privée
+        message: Le message à signer
+        order: L'ordre du groupe
+        h1: H(message) s'il a déjà été calculé par l'appelant
+        
+    Returns:
+        int: Le nonce k
+    """
+    return next(_ECDSA_nonces(private_key, message, order, h1))
 
 def ECDSA_generate_keys(p: int = p) -> Tuple[int, Tuple[int, int]]:
     """
@@ -144,7 +170,7 @@ def ECDSA_generate_keys(p: int = p) -> Tuple[int, Tuple[int, int]]:
     private_key = randbelow(ORDER-2) + 1
     
     # Calcule la clé publique Q = d*G
-    public_key = mult(private_key, BaseU, BaseV, p)
+    public_key = mult_table(private_key, BASE_TABLE, p)
     
     # Vérifie que la clé publique est sur la courbe
     if not validate_point(public_key[0], public_key[1], p):
@@ -152,6 +178,29 @@ def ECDSA_generate_keys(p: int = p) -> Tuple[int, Tuple[int, int]]:
     
     return private_key, public_key
 
+def _ECDSA_sign_with_nonce(h: int, private_key: int, k: int, k_inv: int, p: int = p) -> Optional[Tuple[int, int]]:
+    """
+    Termine une signature ECDSA avec le nonce k et son inverse k_inv
+    
+    Args:
+        h: Le hash du message
+        private_key: La clé privée
+        k, k_inv: Le nonce et son inverse modulo ORDER
+        p: Le module premier de la courbe
+        
+    Returns:
+        Optional[Tuple[int, int]]: La signature (r, s), ou None si r ou s est nul
+    """
+    # Calcule R = k*G et prend l'abscisse
+    r = mult_table(k, BASE_TABLE, p)[0] % ORDER
+    
+    # Calcule s = k^(-1)(h + d*r) mod n
+    s = (k_inv * (h + private_key * r)) % ORDER
+    
+    if r == 0 or s == 0:
+        return None
+    return r, s
+
 def ECDSA_sign(message: bytes, private_key: int, p: int = p) -> Tuple[int, int]:
     """
     Signe un message avec ECDSA
@@ -173,23 +222,49 @@ def ECDSA_sign(message: bytes, private_key: int, p: int = p) -> Tuple[int, int]:
     # Calcule le hash du message
     h = H(message)
     
-    while True:
-        # Génère un nonce k
-        k = ECDSA_generate_nonce(private_key, message)
+    # Essaie les nonces successifs de la RFC 6979 jusqu'à obtenir r et s non nuls
+    for k in _ECDSA_nonces(private_key, message, h1=h):
+        signature = _ECDSA_sign_with_nonce(h, private_key, k, mod_inv(k, ORDER), p)
+        if signature is not None:
+            return signature
+
+def ECDSA_sign_batch(messages: List[bytes], private_keys: List[int], p: int = p) -> List[Tuple[int, int]]:
+    """
+    Signe plusieurs messages avec ECDSA en n'inversant qu'une fois les nonces
+    
+    Args:
+        messages: Les messages à signer
+        private_keys: La clé privée associée à chaque message
+        p: Le module premier de la courbe
         
-        # Calcule R = k*G et prend l'abscisse
-        R = mult(k, BaseU, BaseV, p)
-        r = R[0] % ORDER
-        if r == 0:
-            continue
+    Returns:
+        List[Tuple[int, int]]: Les signatures (r, s), dans l'ordre des messages
         
-        # Calcule s = k^(-1)(h + d*r) mod n
-        k_inv = mod_inv(k, ORDER)
-        s = (k_inv * (h + private_key * r)) % ORDER
-        if s == 0:
-            continue
-            
-        return r, s
+    Raises:
+        ValueError: Si les listes n'ont pas la même longueur ou si une clé est invalide
+    """
+    if len(messages) != len(private_keys):
+        raise ValueError("Il faut une clé privée par message")
+    
+    for private_key in private_keys:
+        if not 0 < private_key < ORDER:
+            raise ValueError("Clé privée invalide")
+    
+    # Calcule h et k pour chaque message
+    hs = [H(message) for message in messages]
+    ks = [ECDSA_generate_nonce(d, message, h1=h) for message, d, h in zip(messages, private_keys, hs)]
+    
+    # Une seule inversion modulaire pour tous les k (astuce de Montgomery)
+    k_invs = batch_mod_inv(ks, ORDER)
+    
+    signatures = []
+    for message, d, h, k, k_inv in zip(messages, private_keys, hs, ks, k_invs):
+        signature = _ECDSA_sign_with_nonce(h, d, k, k_inv, p)
+        # Cas dégénéré (r ou s nul) : ECDSA_sign passe au nonce suivant de la RFC 6979
+        if signature is None:
+            signature = ECDSA_sign(message, d, p)
+        signatures.append(signature)
+    return signatures
 
 def ECDSA_verify(message: bytes, signature: Tuple[int, int], public_key: Tuple[int, int], 
                  p: int = p) -> bool:
@@ -226,10 +301,8 @@ def ECDSA_verify(message: bytes, signature: Tuple[int, int], public_key: Tuple[i
     u1 = (h * w) % ORDER
     u2 = (r * w) % ORDER
     
-    # Calcule u1*G + u2*Q
-    point1 = mult(u1, BaseU, BaseV, p)
-    point2 = mult(u2, public_key[0], public_key[1], p)
-    R = add(point1[0], point1[1], point2[0], point2[1], p)
+    # Calcule u1*G + u2*Q en une seule passe (astuce de Shamir)
+    R = double_mult(u1, BaseU, BaseV, u2, public_key[0], public_key[1], p)
     
     # Vérifie si x_R mod n = r
     return R[0] % ORDER == r
@@ -1,7 +1,9 @@
-from crypto_utils.rfc7748 import x25519, add, sub, mult
+from crypto_utils.rfc7748 import x25519, add, sub, mult, ladder, precompute_table, mult_table
 from crypto_utils.algebra import mod_inv, int_to_bytes, mod_sqrt
 from secrets import randbelow
 from typing import Tuple, Optional
+from functools import lru_cache
+from math import isqrt
 
 # Constantes de la courbe
 p = 2**255 - 19
@@ -11,6 +13,12 @@ ORDER = (2**252 + 27742317777372353535851937790883648493)
 BaseU = 9
 BaseV = mod_sqrt((pow(BaseU, 3, p) + 486662 * pow(BaseU, 2, p) + BaseU) % p, p)
 
+# Table des multiples du point de base, calculée une seule fois au chargement
+BASE_TABLE = precompute_table(BaseU, BaseV, p)
+
+# Borne par défaut de la recherche du logarithme discret au déchiffrement
+MAX_DLOG = 2**20
+
 def validate_point(x: int, y: int, p: int) -> bool:
     """
     Vérifie si un point est sur la courbe Montgomery
@@ -21,17 +29,75 @@ def validate_point(x: int, y: int, p: int) -> bool:
     right = (x * x * x + a * x * x + x) % p
     return left == right
 
-def bruteECLog(C1: int, C2: int, p: int) -> int:
+@lru_cache(maxsize=16)
+def in_subgroup(x: int, y: int, p: int) -> bool:
+    """
+    Vérifie si un point de la courbe appartient au sous-groupe d'ordre ORDER
+    engendré par G, c'est-à-dire si ORDER*(x, y) est le point à l'infini
+    
+    Le résultat est mis en cache : la clé publique est la même pour toute l'élection
+    """
+    try:
+        return mult(ORDER, x, y, p) == (1, 0)
+    except Exception:
+        # add() ne sait pas doubler un point d'ordre 2 (v = 0) : un tel multiple
+        # n'existe pas dans le sous-groupe d'ordre premier ORDER
+        return False
+
+@lru_cache(maxsize=16)
+def _baby_steps(m: int, p: int) -> dict:
+    """
+    Table des pas de bébé {j*G: j} pour 0 <= j < m
+    
+    Les clés sont les points complets : l'abscisse seule ne distingue pas j*G de -j*G
+    """
+    table = {}
+    point = (1, 0)
+    for j in range(m):
+        table.setdefault(point, j)
+        point = add(point[0], point[1], BaseU, BaseV, p)
+    return table
+
+def ECEG_dlog(M: Tuple[int, int], p: int = p, max_value: int = MAX_DLOG) -> int:
+    """
+    Calcule le logarithme discret x tel que x*G = M, avec 0 <= x < max_value,
+    par l'algorithme pas de bébé / pas de géant (O(sqrt(max_value)) additions)
+    
+    Args:
+        M: Le point dont on cherche le logarithme
+        p: Le module premier
+        max_value: Borne stricte sur le logarithme (par exemple le nombre de votants + 1)
+        
+    Returns:
+        int: Le logarithme x
+        
+    Raises:
+        ValueError: Si aucun x < max_value ne convient
+    """
+    step = isqrt(max_value - 1) + 1
+    baby = _baby_steps(step, p)
+    
+    # Pas de géant : ajoute -step*G jusqu'à tomber dans la table
+    giant = mult_table(step, BASE_TABLE, p)
+    neg_x, neg_y = giant[0], -giant[1] % p
+    point = M
+    for i in range(step):
+        j = baby.get(point)
+        if j is not None and i * step + j < max_value:
+            return i * step + j
+        point = add(point[0], point[1], neg_x, neg_y, p)
+    
+    raise ValueError("Déchiffrement invalide")
+
+def bruteECLog(C1: int, C2: int, p: int, max_value: int = MAX_DLOG) -> int:
     """
     ATTENTION: Cette fonction ne doit pas être utilisée en production.
     Elle est vulnérable aux attaques temporelles et n'est présente que pour des tests.
     """
-    s1, s2 = 1, 0
-    for i in range(p):
-        if s1 == C1 and s2 == C2:
-            return i
-        s1, s2 = add(s1, s2, BaseU, BaseV, p)
-    return -1
+    try:
+        return ECEG_dlog((C1, C2), p, max_value)
+    except ValueError:
+        return -1
 
 def EGencode(message: int) -> Tuple[int, int]:
     """
@@ -76,7 +142,7 @@ def ECEG_generate_keys(p: int = p) -> Tuple[int, Tuple[int, int]]:
     private_key = randbelow(ORDER-2) + 1
     
     # Calcule la clé publique H = private_key * G
-    public_key = mult(private_key, BaseU, BaseV, p)
+    public_key = mult_table(private_key, BASE_TABLE, p)
     
     # Vérifie que la clé publique est un point valide sur la courbe
     if not validate_point(public_key[0], public_key[1], p):
@@ -90,13 +156,18 @@ def ECEG_encrypt(message: int, public_key: Tuple[int, int], p: int = p) -> Tuple
     
     Args:
         message: Le message à chiffrer (0 ou 1)
-        public_key: La clé publique du destinataire (point sur la courbe)
+        public_key: La clé publique du destinataire, point du sous-groupe d'ordre ORDER
         p: Le module premier
         
     Returns:
         Tuple[Tuple[int, int], Tuple[int, int]]: (C1, C2) les points chiffrés
+        
+    Raises:
+        ValueError: Si la clé publique n'est pas dans le sous-groupe d'ordre ORDER
     """
-    if not validate_point(public_key[0], public_key[1], p):
+    # k*H n'est égal à (k + 2*ORDER)*H que si H est d'ordre ORDER : une clé avec
+    # une composante d'ordre faible donnerait des chiffrés indéchiffrables
+    if not validate_point(public_key[0], public_key[1], p) or not in_subgroup(public_key[0], public_key[1], p):
         raise ValueError("Clé publique invalide")
     
     # Encode le message en point
@@ -105,20 +176,27 @@ def ECEG_encrypt(message: int, public_key: Tuple[int, int], p: int = p) -> Tuple
     # Génère un nombre aléatoire k cryptographiquement sûr
     k = randbelow(ORDER-2) + 1
     
-    # Calcule C1 = k*G
-    C1 = mult(k, BaseU, BaseV, p)
+    # Calcule C1 = k*G ; chaque fenêtre de la table ajoute un vrai point, y compris
+    # pour les chiffres nuls de k, comme l'échelle ci-dessous pour S : connaître k
+    # suffirait à retrouver le vote (M = C2 - k*H)
+    C1 = mult_table(k, BASE_TABLE, p)
     
-    # Calcule S = k*H où H est la clé publique
-    S = mult(k, public_key[0], public_key[1], p)
+    # Calcule S = k*H où H est la clé publique, par l'échelle de Montgomery
+    # H est d'ordre ORDER : k + 2*ORDER donne le même point et a toujours 254 bits,
+    # l'échelle fait donc le même nombre d'étapes quel que soit k
+    S = ladder(k + 2 * ORDER, public_key[0], public_key[1], p, bits=254)
     
     # Calcule C2 = M + S
     C2 = add(M[0], M[1], S[0], S[1], p)
     
     return (C1, C2)
 
-def ECEG_decrypt(private_key: int, C1: Tuple[int, int], C2: Tuple[int, int], p: int = p) -> int:
+def ECEG_decrypt(private_key: int, C1: Tuple[int, int], C2: Tuple[int, int], p: int = p,
+                 max_value: int = MAX_DLOG) -> int:
     """
     Déchiffre un message avec EC-ElGamal
+    
+    max_value borne strictement le nombre de votes à retrouver
     """
     # Vérifie que les points chiffrés sont sur la courbe
     if not validate_point(C1[0], C1[1], p) or not validate_point(C2[0], C2[1], p):
@@ -147,15 +225,5 @@ def ECEG_decrypt(private_key: int, C1: Tuple[int, int], C2: Tuple[int, int], p:
             return 1
     
     # Si on arrive ici, c'est probablement une somme de points
-    # On compte combien de fois le point de base a été ajouté
-    count = 0
-    point = (1, 0)  # Point à l'infini
-    
-    while count < ORDER:
-        if point == M:
-            return count
-        point = add(point[0], point[1], BaseU, BaseV, p)
-        count += 1
-    
-    raise ValueError("Déchiffrement invalide")
-
+    # On retrouve combien de fois le point de base a été ajouté
+    return ECEG_dlog(M, p, max_value)
@@ -1,6 +1,8 @@
-from crypto_utils.algebra import mod_inv, int_to_bytes
+from crypto_utils.algebra import mod_inv, int_to_bytes, powmod_sec, precompute_pow_table, pow_table
 from secrets import randbelow
 from typing import Tuple
+from functools import lru_cache
+from math import isqrt
 
 # Paramètres du groupe (Nombre premier sûr et son générateur)
 PARAM_P = 0x87A8E61DB4B6663CFFBBD19C651959998CEEF608660DD0F25D2CEED4435E3B00E00DF8F1D61957D4FAF7DF4561B2AA3016C3D91134096FAA3BF4296D830E9A7C209E0C6497517ABD5A8A9D306BCF67ED91F9E6725B4758C022E0B1EF4275BF7B6C5BFC11D45F9088B941F54EB1E59BB8BC39A0BF12307F5C4FDB70C581B23F76B63ACAE1CAA6B7902D52526735488A0EF13C6D9A51BFA4AB3AD8347796524D8EF6A167B5A41825D967E144E5140564251CCACB83E6B486F6B3CA3F7971506026C0B857F689962856DED4010ABD0BE621C3A3960A54E710C375F26375D7014103A4B54330C198AF126116D2276E11715F693877FAD7EF09CADB094AE91E1A1597
@@ -9,7 +11,13 @@ PARAM_Q = 0x8CF83642A709A097B447997640129DA299B1A47D1EB3750BA308B0FE64F5FBD3
 
 PARAM_G = 0x3FB32C9B73134D0B2E77506660EDBD484CA7B18F21EF205407F4793A1A0BA12510DBC15077BE463FFF4FED4AAC0BB555BE3A6C1B0C6B47B1BC3773BF7E8C6F62901228F8C28CBB18A55AE31341000A650196F931C77A57F2DDF463E5E9EC144B777DE62AAAB8A8628AC376D282D6ED3864E67982428EBC831D14348F6F2F9193B5045AF2767164E1DFC967C1FB3F2E55A4BD1BFFE83B9C80D052B985D182EA0ADB2A3B7313D3FE14C8484B1E052588B9B7D2BBD2DF016199ECD06E1557CD0915B3353BBB64E0EC377FD028370DF92B52C7891428CDC67EB6184B523D1DB246C32F63078490F00EF8D647D148D47954515E2327CFEF98C582664B4C0F6CC41659
 
-def validate_params() -> bool:
+# Table des puissances de g pour les exposants < 2^256 (clés privées et aléas k < q)
+G_TABLE = precompute_pow_table(PARAM_G, PARAM_P, PARAM_Q.bit_length())
+
+# Borne par défaut de la recherche du logarithme discret au déchiffrement
+MAX_DLOG = 2**20
+
+def _check_params() -> bool:
     """
     Vérifie que les paramètres du groupe sont valides
     """
@@ -27,6 +35,70 @@ def validate_params() -> bool:
         
     return True
 
+# Vérification faite au chargement plutôt qu'à chaque chiffrement et
+# déchiffrement, soit une fois par candidat de chaque bulletin
+_PARAMS_OK = _check_params()
+
+def validate_params() -> bool:
+    """
+    Indique si les paramètres du groupe sont valides (vérifiés au chargement du module)
+    """
+    return _PARAMS_OK
+
+@lru_cache(maxsize=16)
+def _baby_steps(g: int, m: int, p: int) -> dict:
+    """
+    Table des pas de bébé {g^j mod p: j} pour 0 <= j < m
+    """
+    table = {}
+    e = 1
+    for j in range(m):
+        table.setdefault(e, j)
+        e = (e * g) % p
+    return table
+
+def EG_dlog(m: int, p: int = PARAM_P, g: int = PARAM_G, max_value: int = MAX_DLOG) -> int:
+    """
+    Calcule le logarithme discret x tel que g^x = m mod p, avec 0 <= x < max_value,
+    par l'algorithme pas de bébé / pas de géant (O(sqrt(max_value)) opérations)
+    
+    Args:
+        m: La valeur dont on cherche le logarithme
+        p: Le module premier
+        g: Le générateur du groupe
+        max_value: Borne stricte sur le logarithme (par exemple le nombre de votants + 1)
+        
+    Returns:
+        int: Le logarithme x
+        
+    Raises:
+        ValueError: Si aucun x < max_value ne convient
+    """
+    step = isqrt(max_value - 1) + 1
+    baby = _baby_steps(g, step, p)
+    
+    # Pas de géant : multiplie par g^(-step) jusqu'à tomber dans la table
+    factor = mod_inv(pow(g, step, p), p)
+    y = m
+    for i in range(step):
+        j = baby.get(y)
+        if j is not None and i * step + j < max_value:
+            return i * step + j
+        y = (y * factor) % p
+    
+    raise ValueError("Déchiffrement invalide")
+
+def _g_pow(g: int, e: int, p: int) -> int:
+    """
+    Calcule g^e mod p pour un exposant secret e (clé privée ou aléa k)
+    
+    Lorsque g et p sont ceux du groupe, la table précalculée fait un produit par
+    fenêtre de e quelle que soit sa valeur ; sinon powmod_sec (mpz_powm_sec avec gmpy2)
+    """
+    if g == PARAM_G and p == PARAM_P:
+        return pow_table(e, G_TABLE, p)
+    return powmod_sec(g, e, p)
+
 def EG_generate_keys(p: int = PARAM_P, g: int = PARAM_G) -> Tuple[int, int]:
     """
     Génère une paire de clés ElGamal de manière cryptographiquement sûre
@@ -48,7 +120,7 @@ def EG_generate_keys(p: int = PARAM_P, g: int = PARAM_G) -> Tuple[int, int]:
     private_key = randbelow(PARAM_Q-2) + 1
     
     # Calcule la clé publique h = g^x mod p
-    public_key = pow(g, private_key, p)
+    public_key = _g_pow(g, private_key, p)
     
     return private_key, public_key
 
@@ -75,14 +147,15 @@ def EGM_encrypt(message: int, public_key: int, p: int = PARAM_P, g: int = PARAM_
     k = randbelow(PARAM_Q-2) + 1
     
     # Calcule r = g^k mod p
-    r = pow(g, k, p)
+    r = _g_pow(g, k, p)
     
     # Calcule c = m * y^k mod p
-    c = (message * pow(public_key, k, p)) % p
+    c = (message * powmod_sec(public_key, k, p)) % p
     
     return r, c
 
-def EG_decrypt(private_key: int, c1: int, c2: int, p: int = PARAM_P) -> int:
+def EG_decrypt(private_key: int, c1: int, c2: int, p: int = PARAM_P,
+               max_value: int = MAX_DLOG) -> int:
     """
     Déchiffre un message avec ElGamal
     
@@ -90,6 +163,7 @@ def EG_decrypt(private_key: int, c1: int, c2: int, p: int = PARAM_P) -> int:
         private_key: La clé privée
         c1, c2: Le texte chiffré
         p: Le module premier
+        max_value: Borne stricte sur le nombre de votes à retrouver
         
     Returns:
         int: Le message déchiffré
@@ -104,7 +178,7 @@ def EG_decrypt(private_key: int, c1: int, c2: int, p: int = PARAM_P) -> int:
         raise ValueError("Clé privée invalide")
     
     # Calcule s = c1^x mod p
-    s = pow(c1, private_key, p)
+    s = powmod_sec(c1, private_key, p)
     
     # Calcule m = c2 * s^(-1) mod p
     s_inv = mod_inv(s, p)
@@ -116,15 +190,8 @@ def EG_decrypt(private_key: int, c1: int, c2: int, p: int = PARAM_P) -> int:
     elif m == PARAM_G:
         return 1
     else:
-        # Pour le vote, compte le nombre de g multiplié
-        count = 0
-        temp = 1
-        while temp != m and count < PARAM_Q:
-            temp = (temp * PARAM_G) % p
-            count += 1
-        if temp == m:
-            return count
-        raise ValueError("Déchiffrement invalide")
+        # Pour le vote, retrouve le nombre de g multipliés
+        return EG_dlog(m, p, PARAM_G, max_value)
 
 def EGA_encrypt(message: int, public_key: int, p: int = PARAM_P, g: int = PARAM_G) -> Tuple[int, int]:
     """
@@ -152,14 +219,15 @@ def EGA_encrypt(message: int, public_key: int, p: int = PARAM_P, g: int = PARAM_
     k = randbelow(PARAM_Q-2) + 1
     
     # Calcule c1 = g^k mod p
-    c1 = pow(g, k, p)
+    c1 = _g_pow(g, k, p)
     
     # Calcule c2 = g^m * y^k mod p
-    c2 = (encoded * pow(public_key, k, p)) % p
+    c2 = (encoded * powmod_sec(public_key, k, p)) % p
     
     return c1, c2
 
-def EGA_decrypt(private_key: int, c1: int, c2: int, p: int = PARAM_P, g: int = PARAM_G) -> int:
+def EGA_decrypt(private_key: int, c1: int, c2: int, p: int = PARAM_P, g: int = PARAM_G,
+                max_value: int = MAX_DLOG) -> int:
     """
     Déchiffre un message avec ElGamal (version additive)
     
@@ -168,6 +236,7 @@ def EGA_decrypt(private_key: int, c1: int, c2: int, p: int = PARAM_P, g: int = P
         c1, c2: Le texte chiffré
         p: Le module premier
         g: Le générateur du groupe
+        max_value: Borne stricte sur le message (somme des votes) à retrouver
         
     Returns:
         int: Le message déchiffré (0 ou 1)
@@ -179,7 +248,7 @@ def EGA_decrypt(private_key: int, c1: int, c2: int, p: int = PARAM_P, g: int = P
         raise ValueError("Clé privée invalide")
     
     # Calcule s = c1^x mod p
-    s = pow(c1, private_key, p)
+    s = powmod_sec(c1, private_key, p)
     
     # Calcule m = c2 * s^(-1) mod p
     s_inv = mod_inv(s, p)
@@ -187,16 +256,7 @@ def EGA_decrypt(private_key: int, c1: int, c2: int, p: int = PARAM_P, g: int = P
     
     # Décode le message en cherchant l'exposant
     # m = g^message mod p
-    message = 0
-    temp = 1
-    while temp != m and message < PARAM_Q:
-        message += 1
-        temp = pow(g, message, p)
-    
-    if temp != m:
-        raise ValueError("Déchiffrement invalide")
-    
-    return message
+    return EG_dlog(m, p, g, max_value)
 
 def EGM_decrypt(private_key: int, c1: int, c2: int, p: int = PARAM_P) -> int:
     """
@@ -217,7 +277,7 @@ def EGM_decrypt(private_key: int, c1: int, c2: int, p: int = PARAM_P) -> int:
         raise ValueError("Clé privée invalide")
     
     # Calcule s = c1^x mod p
-    s = pow(c1, private_key, p)
+    s = powmod_sec(c1, private_key, p)
     
     # Calcule m = c2 * s^(-1) mod p
     s_inv = mod_inv(s, p)
@@ -1,5 +1,5 @@
 from dsa import *
-from crypto_utils.algebra import mod_inv
+from crypto_utils.algebra import mod_inv, batch_mod_inv
 from dsa import H
 
 p = PARAM_P
@@ -51,3 +51,8 @@ y = pow(g, x, p)  # Calcul de la clé publique
 is_valid = DSA_verify(str.encode(m), (r, s), y)
 print(f"\nSignature valide: {is_valid}")
 
+# Signature par lot : une seule inversion des nonces, mêmes signatures qu'un par un
+messages = [str.encode(m), b"Second message", b"Third message"]
+keys = [x, DSA_generate_keys()[0], DSA_generate_keys()[0]]
+print(f"Inversion par lot correcte: {batch_mod_inv([k, r, s], q) == [mod_inv(v, q) for v in (k, r, s)]}")
+print(f"Signatures par lot identiques: {DSA_sign_batch(messages, keys) == [DSA_sign(msg, key) for msg, key in zip(messages, keys)]}")
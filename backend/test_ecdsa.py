@@ -1,5 +1,5 @@
 from ecdsa import *
-from crypto_utils.rfc7748 import computeVcoordinate
+from crypto_utils.rfc7748 import computeVcoordinate, mult
 
 # Paramètres de la courbe
 p = p  # Le module premier
@@ -51,4 +51,8 @@ Q = mult(x, BaseU, BaseV, p)
 
 # Vérification de la signature
 is_valid = ECDSA_verify(str.encode(m), (r, s), Q)
-print(f"\nSignature valide: {is_valid}") 
\ No newline at end of file
+print(f"\nSignature valide: {is_valid}") 
+# Signature par lot : une seule inversion des nonces, mêmes signatures qu'un par un
+messages = [str.encode(m), b"Second message", b"Third message"]
+keys = [x, ECDSA_generate_keys()[0], ECDSA_generate_keys()[0]]
+print(f"Signatures par lot identiques: {ECDSA_sign_batch(messages, keys) == [ECDSA_sign(msg, key) for msg, key in zip(messages, keys)]}")
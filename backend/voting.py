@@ -1,7 +1,7 @@
-from typing import List, Tuple, Dict
+from typing import List, Tuple, Dict, Iterable
 from dataclasses import dataclass
+from functools import partial
 from secrets import randbelow
-import json
 from crypto_utils.rfc7748 import add
 from crypto_utils.algebra import int_to_bytes
 
@@ -15,20 +15,36 @@ from elgamal import (
     PARAM_P, PARAM_Q, PARAM_G
 )
 from ecdsa import (
-    ECDSA_generate_keys, ECDSA_sign, ECDSA_verify,
+    ECDSA_generate_keys, ECDSA_sign, ECDSA_sign_batch, ECDSA_verify,
     ORDER as ECDSA_ORDER
 )
 from dsa import (
-    DSA_generate_keys, DSA_sign, DSA_verify,
+    DSA_generate_keys, DSA_sign, DSA_sign_batch, DSA_verify,
     PARAM_Q as DSA_ORDER
 )
 
 NUM_VOTERS = 10
 NUM_CANDIDATES = 5
 
+def _EGM_encrypt_vote(vote: int, public_key: int) -> Tuple[int, int]:
+    """Chiffre un vote avec ElGamal multiplicatif : 0 est encodé comme 1 et 1 comme g"""
+    return EGM_encrypt(PARAM_G if vote == 1 else 1, public_key)
+
+def _EC_combine(a: Tuple, b: Tuple) -> Tuple:
+    """Combine deux chiffrés EC-ElGamal par addition de points"""
+    return (add(a[0][0], a[0][1], b[0][0], b[0][1], EC_P),
+            add(a[1][0], a[1][1], b[1][0], b[1][1], EC_P))
+
+def _EG_combine(a: Tuple, b: Tuple) -> Tuple:
+    """Combine deux chiffrés ElGamal par produit composante par composante"""
+    return ((a[0] * b[0]) % PARAM_P, (a[1] * b[1]) % PARAM_P)
+
 @dataclass
 class Ballot:
     """Représente un bulletin de vote chiffré avec sa signature"""
+    # Pas de __dict__ par bulletin : moins d'allocations lors du dépouillement
+    __slots__ = ("encrypted_votes", "signature", "voter_id")
+
     encrypted_votes: List[Tuple]  # Liste de 5 votes chiffrés
     signature: Tuple[int, int]    # Signature du bulletin
     voter_id: int                 # Identifiant du votant
@@ -54,14 +70,35 @@ class VotingSystem:
                 self.priv_key, self.pub_key = EG_generate_keys()
         else:
             self.priv_key, self.pub_key = election_keys
+
+        # Le mode est fixé pour toute l'élection : les primitives sont choisies
+        # une seule fois ici plutôt qu'à chaque candidat de chaque bulletin.
+        # Les clés sont liées par partial sur des fonctions du module, sans
+        # référence à self (pas de cycle, l'instance reste sérialisable)
+        if use_ec:
+            self._encrypt = partial(ECEG_encrypt, public_key=self.pub_key)
+            self._decrypt = partial(ECEG_decrypt, self.priv_key, max_value=NUM_VOTERS + 1)
+            # Addition de points pour EC-ElGamal
+            self._combine = _EC_combine
+            generate_keys, self._sign, self._verify = ECDSA_generate_keys, ECDSA_sign, ECDSA_verify
+            self._sign_batch = ECDSA_sign_batch
+        else:
+            if use_multiplicative:
+                # Encode 0 comme 1 et 1 comme g pour la version multiplicative
+                self._encrypt = partial(_EGM_encrypt_vote, public_key=self.pub_key)
+                self._decrypt = partial(EG_decrypt, self.priv_key, max_value=NUM_VOTERS + 1)
+            else:
+                self._encrypt = partial(EGA_encrypt, public_key=self.pub_key)
+                self._decrypt = partial(EGA_decrypt, self.priv_key, max_value=NUM_VOTERS + 1)
+            # Produit composante par composante (versions multiplicative et additive)
+            self._combine = _EG_combine
+            generate_keys, self._sign, self._verify = DSA_generate_keys, DSA_sign, DSA_verify
+            self._sign_batch = DSA_sign_batch
             
         # Génère les clés de signature pour chaque votant
         self.voter_keys = {}
         for i in range(NUM_VOTERS):
-            if use_ec:
-                priv, pub = ECDSA_generate_keys()
-            else:
-                priv, pub = DSA_generate_keys()
+            priv, pub = generate_keys()
             self.voter_keys[i] = {"private": priv, "public": pub}
 
     def create_vote(self, candidate: int) -> List[int]:
@@ -81,116 +118,89 @@ class VotingSystem:
             raise ValueError("Vote invalide: la somme doit être égale à 1")
 
         # Chiffre chaque élément du vote
-        encrypted_votes = []
-        for vote in vote_list:
-            if self.use_ec:
-                encrypted = ECEG_encrypt(vote, self.pub_key)
-            else:
-                if self.use_multiplicative:
-                    # Encode 0 comme 1 et 1 comme g pour la version multiplicative
-                    encoded_vote = PARAM_G if vote == 1 else 1
-                    encrypted = EGM_encrypt(encoded_vote, self.pub_key)
-                else:
-                    encrypted = EGA_encrypt(vote, self.pub_key)
-            encrypted_votes.append(encrypted)
+        encrypted_votes = [self._encrypt(vote) for vote in vote_list]
 
         # Crée un message à signer
-        message = b""
-        for encrypted in encrypted_votes:
-            if self.use_ec:
-                # Pour EC-ElGamal, encrypted[0] et encrypted[1] sont des tuples (x,y)
-                message += int_to_bytes(encrypted[0][0]) + int_to_bytes(encrypted[0][1])
-                message += int_to_bytes(encrypted[1][0]) + int_to_bytes(encrypted[1][1])
-            else:
-                # Pour ElGamal classique, encrypted[0] et encrypted[1] sont des entiers
-                message += int_to_bytes(encrypted[0]) + int_to_bytes(encrypted[1])
+        message = self.ballot_message(encrypted_votes)
 
         # Signe le bulletin
-        if self.use_ec:
-            signature = ECDSA_sign(message, self.voter_keys[voter_id]["private"])
-        else:
-            signature = DSA_sign(message, self.voter_keys[voter_id]["private"])
+        signature = self._sign(message, self.voter_keys[voter_id]["private"])
 
         return Ballot(encrypted_votes, signature, voter_id)
 
+    def encrypt_votes(self, votes: Dict[int, List[int]]) -> List[Ballot]:
+        """Chiffre et signe les votes de plusieurs votants, en signant tous les bulletins d'un coup"""
+        for vote_list in votes.values():
+            if sum(vote_list) != 1:
+                raise ValueError("Vote invalide: la somme doit être égale à 1")
+
+        encrypted = {voter_id: [self._encrypt(vote) for vote in vote_list]
+                     for voter_id, vote_list in votes.items()}
+
+        # Les signatures partagent une seule inversion modulaire des nonces
+        signatures = self._sign_batch(
+            [self.ballot_message(encrypted_votes) for encrypted_votes in encrypted.values()],
+            [self.voter_keys[voter_id]["private"] for voter_id in encrypted]
+        )
+
+        return [Ballot(encrypted_votes, signature, voter_id)
+                for (voter_id, encrypted_votes), signature in zip(encrypted.items(), signatures)]
+
+    def ballot_message(self, encrypted_votes: List[Tuple]) -> bytes:
+        """Sérialise les votes chiffrés en un message à signer, en une seule passe"""
+        if self.use_ec:
+            # Pour EC-ElGamal, encrypted[0] et encrypted[1] sont des tuples (x,y)
+            return b"".join(
+                int_to_bytes(c1[0]) + int_to_bytes(c1[1]) + int_to_bytes(c2[0]) + int_to_bytes(c2[1])
+                for c1, c2 in encrypted_votes
+            )
+        # Pour ElGamal classique, encrypted[0] et encrypted[1] sont des entiers
+        return b"".join(int_to_bytes(c1) + int_to_bytes(c2) for c1, c2 in encrypted_votes)
+
     def verify_ballot(self, ballot: Ballot) -> bool:
         """Vérifie la signature d'un bulletin"""
-        message = b""
-        for encrypted in ballot.encrypted_votes:
-            if self.use_ec:
-                message += int_to_bytes(encrypted[0][0]) + int_to_bytes(encrypted[0][1])
-                message += int_to_bytes(encrypted[1][0]) + int_to_bytes(encrypted[1][1])
-            else:
-                message += int_to_bytes(encrypted[0]) + int_to_bytes(encrypted[1])
+        message = self.ballot_message(ballot.encrypted_votes)
 
         pub_key = self.voter_keys[ballot.voter_id]["public"]
         
-        if self.use_ec:
-            return ECDSA_verify(message, ballot.signature, pub_key)
-        else:
-            return DSA_verify(message, ballot.signature, pub_key)
+        return self._verify(message, ballot.signature, pub_key)
 
-    def combine_encrypted_votes(self, ballots: List[Ballot]) -> List[Tuple]:
-        """Combine les votes chiffrés en utilisant la propriété homomorphique"""
-        if not ballots:
-            raise ValueError("Aucun bulletin à combiner")
-            
-        # Vérifie d'abord toutes les signatures
+    def combine_encrypted_votes(self, ballots: Iterable[Ballot]) -> List[Tuple]:
+        """
+        Combine les votes chiffrés en utilisant la propriété homomorphique
+
+        Les bulletins sont vérifiés puis agrégés au fil de l'eau dans un
+        accumulateur : un générateur peut être passé sans que la liste complète
+        des bulletins ne soit jamais construite en mémoire.
+        """
+        combine = self._combine
+        result = None
+        voted_ids = set()
         for ballot in ballots:
+            # Vérifie la signature et refuse les votes en double
+            if ballot.voter_id in voted_ids:
+                raise ValueError(f"Vote en double pour le votant {ballot.voter_id}")
+            voted_ids.add(ballot.voter_id)
+            if len(ballot.encrypted_votes) != NUM_CANDIDATES:
+                raise ValueError(f"Bulletin invalide pour le votant {ballot.voter_id}: "
+                                 f"{len(ballot.encrypted_votes)} votes chiffrés au lieu de {NUM_CANDIDATES}")
             if not self.verify_ballot(ballot):
                 raise ValueError(f"Signature invalide pour le votant {ballot.voter_id}")
 
-        # Initialise le résultat avec le premier bulletin
-        result = []
-        for i in range(NUM_CANDIDATES):
-            if self.use_ec:
-                result.append(((1, 0), (1, 0)))  # Point neutre pour EC
+            # Le premier bulletin initialise l'accumulateur
+            if result is None:
+                result = list(ballot.encrypted_votes)
             else:
-                if self.use_multiplicative:
-                    result.append((1, 1))  # Élément neutre multiplicatif
-                else:
-                    result.append((1, 1))  # Même élément neutre pour additif
+                result = [combine(acc, enc) for acc, enc in zip(result, ballot.encrypted_votes)]
+
+        if result is None:
+            raise ValueError("Aucun bulletin à combiner")
 
-        # Combine tous les bulletins
-        for ballot in ballots:
-            for i in range(NUM_CANDIDATES):
-                if self.use_ec:
-                    # Addition de points pour EC-ElGamal
-                    if result[i][0] == (1, 0):
-                        result[i] = (ballot.encrypted_votes[i][0], ballot.encrypted_votes[i][1])
-                    else:
-                        c1 = add(result[i][0][0], result[i][0][1], 
-                                ballot.encrypted_votes[i][0][0], 
-                                ballot.encrypted_votes[i][0][1], EC_P)
-                        c2 = add(result[i][1][0], result[i][1][1],
-                                ballot.encrypted_votes[i][1][0],
-                                ballot.encrypted_votes[i][1][1], EC_P)
-                        result[i] = (c1, c2)
-                else:
-                    if self.use_multiplicative:
-                        # Version multiplicative
-                        c1 = (result[i][0] * ballot.encrypted_votes[i][0]) % PARAM_P
-                        c2 = (result[i][1] * ballot.encrypted_votes[i][1]) % PARAM_P
-                    else:
-                        # Version additive
-                        c1 = (result[i][0] * ballot.encrypted_votes[i][0]) % PARAM_P
-                        c2 = (result[i][1] * ballot.encrypted_votes[i][1]) % PARAM_P
-                    result[i] = (c1, c2)
-                    
         return result
 
     def decrypt_result(self, combined_votes: List[Tuple]) -> List[int]:
         """Déchiffre le résultat final"""
-        results = []
-        for encrypted in combined_votes:
-            if self.use_ec:
-                decrypted = ECEG_decrypt(self.priv_key, encrypted[0], encrypted[1])
-            else:
-                if self.use_multiplicative:
-                    decrypted = EG_decrypt(self.priv_key, encrypted[0], encrypted[1])
-                else:
-                    decrypted = EGA_decrypt(self.priv_key, encrypted[0], encrypted[1])
-            results.append(decrypted)
+        results = [self._decrypt(encrypted[0], encrypted[1]) for encrypted in combined_votes]
         
         # Vérifie que le nombre total de votes est égal au nombre de votants
         total_votes = sum(results)
@@ -204,14 +214,10 @@ def run_election(use_ec: bool = True, use_multiplicative: bool = False):
     # Initialise le système de vote
     system = VotingSystem(use_ec=use_ec, use_multiplicative=use_multiplicative)
     
-    # Simule les votes
-    ballots = []
-    for voter_id in range(NUM_VOTERS):
-        # Choix aléatoire d'un candidat
-        candidate = randbelow(NUM_CANDIDATES)
-        vote = system.create_vote(candidate)
-        ballot = system.encrypt_vote(vote, voter_id)
-        ballots.append(ballot)
+    # Simule les votes (choix aléatoire d'un candidat pour chaque votant)
+    votes = {voter_id: system.create_vote(randbelow(NUM_CANDIDATES))
+             for voter_id in range(NUM_VOTERS)}
+    ballots = system.encrypt_votes(votes)
     
     # Combine les votes
     combined = system.combine_encrypted_votes(ballots)
@@ -280,6 +286,36 @@ def test_signatures():
         is_valid = system_dsa.verify_ballot(invalid_ballot)
         print(f"Votant {voter_id} (signature invalide): {'non détectée!' if is_valid else 'correctement rejetée'}")
 
+def test_combine_checks():
+    """
+    Teste les contrôles du dépouillement : votant en double, bulletin de mauvaise taille et urne vide
+    """
+    print("\nTest des contrôles du dépouillement:")
+    print("-" * 50)
+    
+    system = VotingSystem(use_ec=False)
+    ballots = system.encrypt_votes({voter_id: system.create_vote(0) for voter_id in range(2)})
+    
+    # Bulletin tronqué à 2 votes chiffrés mais correctement signé
+    short_votes = ballots[1].encrypted_votes[:2]
+    short_ballot = Ballot(
+        short_votes,
+        DSA_sign(system.ballot_message(short_votes), system.voter_keys[1]["private"]),
+        1
+    )
+    
+    cases = [
+        ("Votant en double", [ballots[0], ballots[1], ballots[0]]),
+        ("Bulletin de mauvaise taille", [ballots[0], short_ballot]),
+        ("Aucun bulletin", []),
+    ]
+    for name, case in cases:
+        try:
+            system.combine_encrypted_votes(case)
+            print(f"{name}: non détecté!")
+        except ValueError as e:
+            print(f"{name}: rejeté ({e})")
+
 if __name__ == "__main__":
     # Tests avec les différentes versions
     print("\nTest avec EC-ElGamal:")
@@ -293,3 +329,6 @@ if __name__ == "__main__":
     
     # Tests de signature
     test_signatures()
+
+    # Tests des contrôles du dépouillement
+    test_combine_checks()